@@ -3,6 +3,7 @@ import requests
 import logging
 import json
 import re
+import orjson
 from src.config import Config
 from src.auth import Auth
 import jsonschema
@@ -110,6 +111,10 @@ def clean_post_payload(post_data: dict) -> dict:
 
 # --- FIM DA LÓGICA DE LIMPEZA ---
 
+# Cache de GETs condicionais: URL -> (ETag, corpo JSON já parseado).
+# Permite que o backend responda 304 Not Modified sem reenviar a lista de posts.
+_etag_cache = {}
+
 
 def get_existing_posts(headers):
     """
@@ -119,10 +124,25 @@ def get_existing_posts(headers):
     """
     url = Config.API_URL
     logger.info(f"Buscando posts existentes em: {url}")
+    request_headers = dict(headers or {})
+    cached = _etag_cache.get(url)
+    if cached:
+        request_headers["If-None-Match"] = cached[0]
+
     try:
-        response = requests.get(url, headers=headers, timeout=Config.REQUEST_TIMEOUT)
+        response = requests.get(url, headers=request_headers, timeout=Config.REQUEST_TIMEOUT)
         response.raise_for_status()
-        response_data = response.json()
+
+        if response.status_code == 304 and cached:
+            logger.info(f"Posts existentes não modificados desde a última consulta (ETag {cached[0]}). Reutilizando resposta em cache.")
+            response_data = cached[1]
+        else:
+            response_data = orjson.loads(response.content)
+            etag = response.headers.get("ETag")
+            if etag:
+                _etag_cache[url] = (etag, response_data)
+            else:
+                _etag_cache.pop(url, None)
 
         # CORREÇÃO: Acessar a lista de posts dentro da chave "content" do objeto Page do Spring Boot
         posts = response_data.get("content", [])
@@ -194,28 +214,23 @@ def send_post(post_data, headers):
         logger.error(f"Erro inesperado ao enviar post para {url}: {str(e)}", exc_info=True)
         raise
 
-@retry(stop=stop_after_attempt(3), wait=wait_fixed(2))
-def send_logs_to_backend(log_data, headers=None):
+def prepare_log_payload(log_data):
     """
-    Envia dados de log ou relatório para um endpoint de logs no backend.
-    Headers são opcionais se o endpoint de logs não exigir autenticação,
-    mas é boa prática incluir se a API for protegida.
+    Retorna uma cópia do log pronta para envio ao backend de logs,
+    com o timestamp normalizado para ISO 8601 terminado em 'Z'.
     """
-    url = Config.LOGS_API_URL
-    if not url:
-        logger.warning("LOGS_API_URL não configurada. Pulando envio de logs para o backend.")
-        return
-
-    logger.info(f"Enviando log para o backend em: {url}")
-    
     # Criar uma cópia mutável para manipulação
     log_data_to_send = log_data.copy()
 
     # CORREÇÃO: Garantir que o timestamp esteja no formato ISO 8601 com 'Z' para UTC
     # Isso é crucial para que o Spring Boot deserialize corretamente java.time.Instant
     if "timestamp" in log_data_to_send and isinstance(log_data_to_send["timestamp"], datetime):
-        # Formatando para 'YYYY-MM-DDTHH:MM:SS.ffffffZ' para java.time.Instant
-        log_data_to_send["timestamp"] = log_data_to_send["timestamp"].isoformat(timespec='microseconds') + 'Z'
+        timestamp = log_data_to_send["timestamp"]
+        if timestamp.tzinfo is not None:
+            timestamp = timestamp.astimezone(timezone.utc)
+        # Formatando para 'YYYY-MM-DDTHH:MM:SS.ffffffZ' para java.time.Instant, em uma única chamada strftime
+        # (isoformat() + 'Z' em um datetime com timezone gerava '...+00:00Z', que não é um Instant válido)
+        log_data_to_send["timestamp"] = timestamp.strftime("%Y-%m-%dT%H:%M:%S.%fZ")
     elif "timestamp" in log_data_to_send and isinstance(log_data_to_send["timestamp"], str):
          # Se já for string, garantir que termina com 'Z' se for UTC
          # Remove qualquer offset ou 'Z' existente e adiciona 'Z' no final para padronizar
@@ -224,6 +239,25 @@ def send_logs_to_backend(log_data, headers=None):
          logger.warning(f"Timestamp '{log_data_to_send['timestamp']}' já é string. Normalizando para formato Z: '{clean_timestamp}Z'")
          log_data_to_send["timestamp"] = clean_timestamp + 'Z'
 
+    return log_data_to_send
+
+
+@retry(stop=stop_after_attempt(3), wait=wait_fixed(2))
+def send_logs_to_backend(log_data, headers=None):
+    """
+    Envia dados de log ou relatório para um endpoint de logs no backend.
+    Headers são opcionais se o endpoint de logs não exigir autenticação,
+    mas é boa prática incluir se a API for protegida.
+    """
+    url = Config.LOGS_API_URL
+    if not url:
+        logger.warning("LOGS_API_URL não configurada. Pulando envio de logs para o backend.")
+        return
+
+    logger.info(f"Enviando log para o backend em: {url}")
+
+    log_data_to_send = prepare_log_payload(log_data)
+
     # Agora, use a cópia convertida para o log e para o envio
     logger.debug(f"Dados de log a enviar (JSON serializável): {json.dumps(log_data_to_send, ensure_ascii=False)}")
 
@@ -53,6 +53,13 @@ class Config:
     REDDIT_CLIENT_SECRET = os.getenv("REDDIT_CLIENT_SECRET")
     REDDIT_USER_AGENT = os.getenv("REDDIT_USER_AGENT")
 
+    # Configurações do servidor FastAPI (uvicorn)
+    SERVER_HOST = os.getenv("SERVER_HOST", "0.0.0.0")
+    SERVER_PORT = int(os.getenv("SERVER_PORT", 8000))
+    # Cada worker é um processo separado: o registro de execuções (/trigger-status) e os caches são por processo
+    SERVER_WORKERS = int(os.getenv("SERVER_WORKERS", 1))
+    SERVER_LOG_LEVEL = os.getenv("SERVER_LOG_LEVEL", "warning")
+
     # Configuração de JWT (para o servidor Python verificar tokens recebidos)
     JWT_SECRET_KEY = os.getenv("JWT_SECRET_KEY")
 
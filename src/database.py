@@ -1,5 +1,6 @@
 # src/database.py
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker
 from src.config import Config
 import logging
@@ -10,6 +11,8 @@ logger = logging.getLogger(__name__)
 
 # Configuração do PostgreSQL
 DATABASE_URL = Config.DATABASE_URL
+# Mesma base, com o driver assíncrono asyncpg (usado pelos endpoints async do FastAPI)
+ASYNC_DATABASE_URL = DATABASE_URL.replace("postgresql://", "postgresql+asyncpg://", 1)
 
 logger.info(f"Configurando engine SQLAlchemy para URL: postgresql://{Config.DB_USER}:******@{Config.DB_HOST}:{Config.DB_PORT}/{Config.DB_NAME}")
 
@@ -37,6 +40,17 @@ except Exception as e:
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 logger.info("SessionLocal para SQLAlchemy configurada.")
 
+# Engine e sessão assíncronas: consultas feitas em handlers async não bloqueiam o event loop
+try:
+    async_engine = create_async_engine(ASYNC_DATABASE_URL)
+    logger.info("Engine assíncrono SQLAlchemy (asyncpg) criado com sucesso.")
+except Exception as e:
+    logger.critical(f"Erro CRÍTICO ao configurar engine assíncrono SQLAlchemy para {Config.DB_NAME}: {str(e)}", exc_info=True)
+    raise RuntimeError(f"Falha ao configurar engine assíncrono SQLAlchemy: {str(e)}")
+
+AsyncSessionLocal = sessionmaker(bind=async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+logger.info("AsyncSessionLocal para SQLAlchemy configurada.")
+
 # Base para modelos declarativos (DEFINIDA AQUI E IMPORTADA EM models.py)
 Base = declarative_base()
 
@@ -50,4 +64,13 @@ def get_db():
         yield db
     finally:
         logger.debug("Fechando sessão de banco de dados.")
-        db.close()
\ No newline at end of file
+        db.close()
+
+
+# Função para obter sessão assíncrona de banco de dados (dependência FastAPI)
+async def get_async_db():
+    """Dependency para obter uma sessão assíncrona de banco de dados."""
+    async with AsyncSessionLocal() as db:
+        logger.debug("Obtendo sessão assíncrona de banco de dados.")
+        yield db
+        logger.debug("Fechando sessão assíncrona de banco de dados.")
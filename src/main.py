@@ -12,7 +12,7 @@ from src.auth import Auth
 from src.api import get_existing_posts, send_post, send_logs_to_backend
 from src.scraping import scrape_sources
 from src.content import generate_content, determine_content_type
-from src.utils import save_report, save_payload_to_file
+from src.utils import save_report_async, save_payload_to_file
 
 logger = logging.getLogger(__name__)
 
@@ -34,6 +34,9 @@ async def process_theme(theme_config, headers, existing_titles, output_format_ov
     logger.info(f"Iniciando processamento para o tema: '{tema}'")
     posts_for_theme = []
     post_start_time = time.time()
+    # As chamadas síncronas (Gemini) rodam em threads do executor: a automação roda dentro do
+    # event loop do servidor, e bloqueá-lo travaria os demais endpoints enquanto o job executa.
+    loop = asyncio.get_event_loop()
 
     try:
         # 1. Coleta de Material
@@ -53,7 +56,7 @@ async def process_theme(theme_config, headers, existing_titles, output_format_ov
         logger.info(f"Gerando conteúdo com Gemini para o tema '{tema}' com content_type '{content_type}'...")
 
         # 3. Gerar Conteúdo com Gemini
-        generated_content_data = generate_content(tema, compiled_raw_material, content_type)
+        generated_content_data = await loop.run_in_executor(None, generate_content, tema, compiled_raw_material, content_type)
 
         if not generated_content_data or not all(generated_content_data.get(field) for field in ["title", "excerpt", "content", "metaDescription"]):
             logger.error(f"Falha na geração ou parsing do conteúdo do Gemini para '{tema}' ({content_type}). Conteúdo gerado: {generated_content_data}")
@@ -87,7 +90,7 @@ async def process_theme(theme_config, headers, existing_titles, output_format_ov
         # 6. Gerar e Preparar Post Social (se configurado e não for o tipo principal)
         if theme_config.get("generateSocial", False) and content_type != "social":
             logger.info(f"Gerando post social para o tema '{tema}'...")
-            social_generated_data = generate_content(tema, compiled_raw_material, "social")
+            social_generated_data = await loop.run_in_executor(None, generate_content, tema, compiled_raw_material, "social")
             if social_generated_data and all(social_generated_data.get(field) for field in ["title", "excerpt", "content", "metaDescription"]):
                 social_post_data = {
                     "title": social_generated_data.get("title", {}),
@@ -126,6 +129,9 @@ async def main(output_format=None, theme=None, auth_headers=None):
     report_lines = [f"Relatório de Envio - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')} ({datetime.now().astimezone().tzinfo})\n"]
     metrics = {"created": 0, "failed": 0, "categories": {}, "retries": 0}
     start_time = time.time()
+    # Autenticação, busca de posts e envios usam requests (síncrono, com retries): rodam em threads
+    # do executor para não bloquear o event loop do servidor durante a automação.
+    loop = asyncio.get_event_loop()
 
     try:
         # 1. Autenticar no Backend (ou usar headers passados)
@@ -134,7 +140,7 @@ async def main(output_format=None, theme=None, auth_headers=None):
             logger.info("Usando headers de autenticação passados para a automação.")
         else:
             logger.info("Autenticando no backend com credenciais de admin...")
-            headers = Auth.authenticate()
+            headers = await loop.run_in_executor(None, Auth.authenticate)
             logger.info("Autenticação no backend bem-sucedida.")
 
         # 2. Preparar Temas para Processar
@@ -162,7 +168,7 @@ async def main(output_format=None, theme=None, auth_headers=None):
 
         # 3. Buscar Posts Existentes (para verificar duplicados)
         logger.info("Buscando posts existentes no backend para verificar duplicados...")
-        existing_titles = get_existing_posts(headers)
+        existing_titles = await loop.run_in_executor(None, get_existing_posts, headers)
         logger.info(f"Encontrados {len(existing_titles)} títulos de posts existentes em PT.")
 
         all_posts_to_send = []
@@ -192,11 +198,12 @@ async def main(output_format=None, theme=None, auth_headers=None):
 
                 metrics["categories"][tema] = metrics["categories"].get(tema, 0) + 1
 
-                # Salvar payload JSON antes de enviar (útil para depuração)
+                # Salvar payload JSON antes de enviar (útil para depuração).
+                # Só serializa e enfileira: a gravação em disco acontece na thread de escrita de payloads.
                 save_payload_to_file(post_data, tema, content_type)
 
                 try:
-                    response = send_post(post_data, headers) # send_post já está em api.py
+                    response = await loop.run_in_executor(None, send_post, post_data, headers) # send_post já está em api.py
                     response_json = response.json()
                     post_id_spring = response_json.get("id") # ID retornado pelo Spring Boot
 
@@ -232,7 +239,9 @@ async def main(output_format=None, theme=None, auth_headers=None):
                     "metrics": metrics,
                     "duration_seconds": (time.time() - start_time)
                 }
-                send_logs_to_backend(log_report_data, headers)
+                # send_logs_to_backend é síncrono (requests + retries): roda em uma thread do executor
+                # para não bloquear o event loop (a automação roda dentro do servidor FastAPI).
+                await loop.run_in_executor(None, send_logs_to_backend, log_report_data, headers)
                 logger.info("Relatório de execução enviado para o backend de logs.")
             except Exception as e:
                 logger.error(f"Falha ao enviar relatório de execução para o backend de logs: {str(e)}", exc_info=True)
@@ -246,14 +255,14 @@ async def main(output_format=None, theme=None, auth_headers=None):
         logger.info("Processo de automação finalizado.")
         logger.info(f"Métricas finais: Criados={metrics['created']}, Falhas={metrics['failed']}")
 
-        save_report(report_lines)
+        await save_report_async(report_lines)
 
         return "\n".join(report_lines)
 
     except Exception as e:
         logger.critical(f"Erro CRÍTICO na automação: {str(e)}", exc_info=True)
         report_lines.append(f"\n[ERRO CRÍTICO] Automação interrompida: {str(e)}")
-        save_report(report_lines, is_error=True)
+        await save_report_async(report_lines, is_error=True)
         raise
 
 
@@ -6,6 +6,7 @@ from sqlalchemy.sql import func
 from pydantic import BaseModel
 from typing import List, Dict, Optional
 
+from src.config import Config
 from src.database import Base
 
 class AutomationRequest(Base):
@@ -20,8 +21,9 @@ class AutomationRequest(Base):
         return f"<AutomationRequest(id={self.id}, theme='{self.theme}', format='{self.output_format}')>"
 
 class TriggerRequest(BaseModel):
-    output_format: str
-    theme: Optional[str] = None
+    """Modelo Pydantic para o corpo da requisição POST /trigger."""
+    output_format: str = Config.OUTPUT_FORMAT
+    theme: Optional[str] = None # Tema é opcional
 
 class PostRequestDTO(BaseModel):
     title: Dict[str, str]
@@ -1,31 +1,118 @@
 # src/scraping.py
 import asyncio
+import hashlib
 import logging
+import re
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 import aiohttp
 import asyncpraw
+import orjson
 import requests
 from asyncprawcore.exceptions import Forbidden as RedditForbidden # Importar Forbidden especificamente
+from asyncprawcore.exceptions import NotFound as RedditNotFound
+from asyncprawcore.exceptions import RequestException as RedditRequestException
+from asyncprawcore.exceptions import ServerError as RedditServerError
+from asyncprawcore.exceptions import TooManyRequests as RedditTooManyRequests
 from newsapi import NewsApiClient
+from newsapi.newsapi_exception import NewsAPIException
 from serpapi import GoogleSearch
 from src.config import Config
-from tenacity import retry, stop_after_attempt, wait_fixed, retry_if_exception_type
+from tenacity import retry, stop_after_attempt, wait_exponential_jitter, retry_if_exception
 
 logger = logging.getLogger(__name__)
 
-# Configuração do NewsApiClient
-newsapi = NewsApiClient(api_key=Config.NEWSAPI_KEY)
+# Erros de rede/servidor e de limite de requisições (429) considerados transitórios: vale a pena tentar novamente
+TRANSIENT_ERRORS = (aiohttp.ClientError, requests.exceptions.RequestException, RedditRequestException, RedditServerError, RedditTooManyRequests)
 
-# Configuração do Reddit
-reddit = asyncpraw.Reddit(
-    client_id=Config.REDDIT_CLIENT_ID,
-    client_secret=Config.REDDIT_CLIENT_SECRET,
-    user_agent=Config.REDDIT_USER_AGENT
+
+def is_retryable_error(exception):
+    """
+    Indica se uma exceção dos scrapers deve ser retentada.
+    Erros de autenticação (401/403) não são retentados: uma chave inválida não melhora com novas tentativas.
+    O NewsAPI converte qualquer resposta de erro em NewsAPIException; só o limite de requisições ('rateLimited') é retentado.
+    """
+    if isinstance(exception, NewsAPIException):
+        details = exception.get_exception()
+        return isinstance(details, dict) and details.get("code") == "rateLimited"
+    if not isinstance(exception, TRANSIENT_ERRORS):
+        return False
+    response = getattr(exception, "response", None)
+    status = getattr(response, "status_code", None) or getattr(response, "status", None) or getattr(exception, "status", None)
+    return status not in (401, 403)
+
+
+# Backoff exponencial com jitter: evita que retentativas de vários scrapers colidam no mesmo instante
+retry_transient = retry(
+    stop=stop_after_attempt(4),
+    wait=wait_exponential_jitter(initial=1, max=30),
+    retry=retry_if_exception(is_retryable_error),
+    reraise=True
 )
 
+
+@lru_cache(maxsize=None)
+def get_newsapi_client():
+    """
+    Cria (uma única vez, sob demanda) o cliente do NewsAPI.
+    Usa uma requests.Session compartilhada: as consultas paralelas por idioma reaproveitam
+    conexões keep-alive com newsapi.org em vez de refazer o handshake TCP/TLS a cada chamada.
+    """
+    return NewsApiClient(api_key=Config.NEWSAPI_KEY, session=requests.Session())
+
+
+@lru_cache(maxsize=None)
+def get_reddit_client():
+    """Cria (uma única vez, sob demanda) o cliente do Reddit."""
+    return asyncpraw.Reddit(
+        client_id=Config.REDDIT_CLIENT_ID,
+        client_secret=Config.REDDIT_CLIENT_SECRET,
+        user_agent=Config.REDDIT_USER_AGENT
+    )
+
+
+def build_item(title, url, content):
+    """
+    Monta o dicionário padrão de um item coletado.
+    'title_lc' guarda o título já em minúsculas para que as etapas seguintes não precisem recalculá-lo.
+    """
+    return {
+        "title": title,
+        "title_lc": title.lower(),
+        "url": url,
+        "content": content
+    }
+
+# Palavras ignoradas ao comparar títulos (PT, EN, ES)
+TITLE_STOPWORDS = frozenset({
+    "a", "o", "as", "os", "um", "uma", "de", "do", "da", "dos", "das", "e", "em", "no", "na", "nos", "nas",
+    "para", "por", "com", "que", "the", "an", "of", "and", "to", "in", "on", "for", "with", "is", "at",
+    "el", "la", "los", "las", "un", "una", "y", "en", "del", "al", "con", "para", "es"
+})
+_PUNCTUATION_RE = re.compile(r"[^\w\s]")
+
+
+def normalize_title(title_lc):
+    """Normaliza um título já em minúsculas: remove pontuação, stopwords e espaços extras."""
+    words = _PUNCTUATION_RE.sub(" ", title_lc).split()
+    return " ".join(word for word in words if word not in TITLE_STOPWORDS)
+
+
+def title_fingerprint(item):
+    """
+    Impressão digital curta do título normalizado de um item.
+    Identifica a mesma notícia publicada sob URLs diferentes (AMP, parâmetros de rastreamento, cópias).
+    Retorna None se o título normalizado ficar vazio.
+    """
+    normalized = normalize_title(item.get("title_lc") or item["title"].lower())
+    if not normalized:
+        return None
+    return hashlib.blake2b(normalized.encode("utf-8"), digest_size=8).digest()
+
 # Configuração do SerpApi (Google Search)
 # A chave da API do Serper é usada diretamente na chamada da API, não precisa de objeto global aqui.
 
-@retry(stop=stop_after_attempt(3), wait=wait_fixed(2), retry=retry_if_exception_type(aiohttp.ClientError))
+@retry_transient
 async def scrape_reddit(query):
     """
     Busca posts relevantes no Reddit usando a biblioteca asyncpraw.
@@ -34,50 +121,46 @@ async def scrape_reddit(query):
     logger.info(f"Buscando posts do Reddit para: '{query}'")
     results = []
     try:
-        # Busca subreddits relacionados à query
-        # Usamos search_by_name para encontrar subreddits relevantes
-        subreddits = [
-            await reddit.subreddit("technology"),
-            await reddit.subreddit("news"),
-            await reddit.subreddit("worldnews")
-        ]
-        
+        reddit = get_reddit_client()
+        # Subreddits gerais onde a busca é feita
+        subreddit_names = ["technology", "news", "worldnews"]
+
         # Tenta encontrar um subreddit mais específico se a query for muito direcionada
+        specific_name = query.replace(" ", "")
         try:
-            # Isso pode levantar um asyncprawcore.exceptions.NotFound se o subreddit não existir
-            search_subreddit = await reddit.subreddit(query.replace(" ", "")) # Tenta um subreddit com o nome da query
-            subreddits.insert(0, search_subreddit) # Prioriza o subreddit específico
-        except asyncprawcore.exceptions.NotFound:
-            logger.warning(f"Subreddit '{query.replace(' ', '')}' não encontrado. Usando subreddits gerais.")
+            # fetch=True valida a existência agora; um subreddit inexistente no multireddit derrubaria a busca inteira
+            await reddit.subreddit(specific_name, fetch=True)
+            subreddit_names.insert(0, specific_name) # Prioriza o subreddit específico
+        except RedditNotFound:
+            logger.warning(f"Subreddit '{specific_name}' não encontrado. Usando subreddits gerais.")
         except Exception as e:
             logger.warning(f"Erro ao tentar encontrar subreddit específico para '{query}': {e}")
 
-
-        for subreddit in subreddits:
-            logger.debug(f"Buscando em r/{subreddit.display_name} para '{query}'")
-            async for submission in subreddit.hot(limit=20): # Aumentado limite para ter mais material
-                if query.lower() in submission.title.lower() or query.lower() in submission.selftext.lower():
-                    results.append({
-                        "title": submission.title,
-                        "url": submission.url,
-                        "content": submission.selftext if submission.selftext else submission.title # Usar selftext se existir, senão o título
-                    })
-                    if len(results) >= 10: # Limitar a 10 resultados por fonte para não sobrecarregar
-                        break
-            if len(results) >= 10:
-                break # Se já temos 10 de qualquer subreddit, paramos
+        # Uma única busca no multireddit (ex: "technology+news+worldnews"): o Reddit já devolve
+        # apenas posts relevantes, em vez de baixarmos 20 posts "hot" por subreddit e filtrarmos localmente.
+        multireddit = await reddit.subreddit("+".join(subreddit_names))
+        logger.debug(f"Buscando em r/{multireddit.display_name} para '{query}'")
+        async for submission in multireddit.search(query, sort="hot", time_filter="week", limit=10): # Limitar a 10 resultados por fonte
+            results.append(build_item(
+                submission.title,
+                submission.url,
+                submission.selftext if submission.selftext else submission.title # Usar selftext se existir, senão o título
+            ))
 
         logger.info(f"Encontrados {len(results)} resultados do Reddit para '{query}'.")
         return results
     except RedditForbidden as e: # Captura o erro 403 especificamente
         logger.error(f"Erro ao buscar posts do Reddit para '{query}': {e}. Verifique suas credenciais REDDIT_CLIENT_ID, REDDIT_CLIENT_SECRET e REDDIT_USER_AGENT.")
         return [] # Retorna lista vazia em caso de 403
+    except TRANSIENT_ERRORS as e:
+        logger.warning(f"Erro transitório ao buscar posts do Reddit para '{query}': {e}")
+        raise # Levanta para o retry com backoff
     except Exception as e:
         logger.error(f"Erro inesperado ao buscar posts do Reddit para '{query}': {e}", exc_info=True)
         return []
 
 
-@retry(stop=stop_after_attempt(3), wait=wait_fixed(2), retry=retry_if_exception_type(requests.exceptions.RequestException))
+@retry_transient
 def scrape_newsapi(query):
     """
     Busca artigos de notícias relevantes usando a NewsAPI.
@@ -87,32 +170,49 @@ def scrape_newsapi(query):
     results = []
     try:
         # Busca artigos em português, inglês e espanhol
+        newsapi = get_newsapi_client()
         languages = ['pt', 'en', 'es']
-        for lang in languages:
-            top_headlines = newsapi.get_everything(
+
+        def fetch_language(lang):
+            return newsapi.get_everything(
                 q=query,
                 language=lang,
                 sort_by='relevancy',
                 page_size=10 # Limitar a 10 resultados por idioma
             )
+
+        # As consultas por idioma são independentes: executa em paralelo em vez de uma após a outra
+        with ThreadPoolExecutor(max_workers=len(languages)) as executor:
+            responses = list(executor.map(fetch_language, languages))
+
+        for top_headlines in responses:
             for article in top_headlines.get('articles', []):
                 if article.get('title') and article.get('description'):
-                    results.append({
-                        "title": article['title'],
-                        "url": article['url'],
-                        "content": article['description'] # NewsAPI geralmente tem descrição
-                    })
+                    results.append(build_item(
+                        article['title'],
+                        article['url'],
+                        article['description'] # NewsAPI geralmente tem descrição
+                    ))
             if len(results) >= 20: # Limitar total de resultados para não sobrecarregar
                 break
 
         logger.info(f"Encontrados {len(results)} resultados do NewsAPI para '{query}'.")
         return results
+    except TRANSIENT_ERRORS as e:
+        logger.warning(f"Erro transitório ao buscar artigos do NewsAPI para '{query}': {e}")
+        raise # Levanta para o retry com backoff
+    except NewsAPIException as e:
+        if not is_retryable_error(e):
+            logger.error(f"Erro ao buscar artigos do NewsAPI para '{query}': {e.get_exception()}")
+            return []
+        logger.warning(f"Limite de requisições do NewsAPI atingido para '{query}'. Tentando novamente com backoff.")
+        raise # Levanta para o retry com backoff
     except Exception as e:
         logger.error(f"Erro ao buscar artigos do NewsAPI para '{query}': {e}", exc_info=True)
         return []
 
 
-@retry(stop=stop_after_attempt(3), wait=wait_fixed(2), retry=retry_if_exception_type(requests.exceptions.RequestException))
+@retry_transient
 def scrape_serper(query):
     """
     Realiza uma busca no Google usando SerpApi para encontrar artigos e informações.
@@ -126,35 +226,32 @@ def scrape_serper(query):
             "api_key": Config.SERPER_API_KEY,
             "hl": "pt", # Idioma da interface de busca
             "gl": "br", # País da busca
-            "num": 20 # Número de resultados
+            "num": 20, # Número de resultados
+            "output": "json"
         }
         search = GoogleSearch(params)
-        data = search.get_dict()
+        # orjson parseia o payload de 'organic_results'/'news_results' bem mais rápido que o json da stdlib usado por get_dict()
+        data = orjson.loads(search.get_results())
 
         # Processar resultados de 'organic_results'
         for result in data.get("organic_results", []):
             if result.get('title') and result.get('snippet') and result.get('link'):
-                results.append({
-                    "title": result['title'],
-                    "url": result['link'],
-                    "content": result['snippet']
-                })
+                results.append(build_item(result['title'], result['link'], result['snippet']))
             if len(results) >= 15: # Limitar a 15 resultados
                 break
         
         # Opcional: Processar resultados de 'news_results' se houver
         for result in data.get("news_results", []):
             if result.get('title') and result.get('snippet') and result.get('link'):
-                results.append({
-                    "title": result['title'],
-                    "url": result['link'],
-                    "content": result['snippet']
-                })
+                results.append(build_item(result['title'], result['link'], result['snippet']))
             if len(results) >= 25: # Limitar total de resultados
                 break
 
         logger.info(f"Encontrados {len(results)} resultados do SerpApi para '{query}'.")
         return results
+    except TRANSIENT_ERRORS as e:
+        logger.warning(f"Erro transitório ao buscar no Google via SerpApi para '{query}': {e}")
+        raise # Levanta para o retry com backoff
     except Exception as e:
         logger.error(f"Erro ao buscar no Google via SerpApi para '{query}': {e}", exc_info=True)
         return []
@@ -182,32 +279,26 @@ async def scrape_sources(theme):
 
     results = await asyncio.gather(*tasks, return_exceptions=True) # Captura exceções
 
-    # Processar resultados do Reddit
-    reddit_results = results[0]
-    if isinstance(reddit_results, list):
-        for item in reddit_results:
-            all_raw_material.append(f"Título: {item['title']}\nConteúdo: {item['content']}")
-            all_source_urls.append(item['url'])
-    elif isinstance(reddit_results, Exception):
-        logger.error(f"Erro ao obter resultados do Reddit: {reddit_results}")
-
-    # Processar resultados do NewsAPI
-    newsapi_results = results[1]
-    if isinstance(newsapi_results, list):
-        for item in newsapi_results:
+    # Processar resultados de cada fonte, ignorando notícias repetidas entre fontes
+    # (mesmo título normalizado), que só inflariam o material enviado ao Gemini
+    seen_titles = set()
+    duplicated_items = 0
+    for source_name, source_results in zip(("Reddit", "NewsAPI", "SerpApi"), results):
+        if isinstance(source_results, Exception):
+            logger.error(f"Erro ao obter resultados do {source_name}: {source_results}")
+            continue
+        for item in source_results:
+            fingerprint = title_fingerprint(item)
+            if fingerprint is not None:
+                if fingerprint in seen_titles:
+                    duplicated_items += 1
+                    continue
+                seen_titles.add(fingerprint)
             all_raw_material.append(f"Título: {item['title']}\nConteúdo: {item['content']}")
             all_source_urls.append(item['url'])
-    elif isinstance(newsapi_results, Exception):
-        logger.error(f"Erro ao obter resultados do NewsAPI: {newsapi_results}")
 
-    # Processar resultados do SerpApi
-    serper_results = results[2]
-    if isinstance(serper_results, list):
-        for item in serper_results:
-            all_raw_material.append(f"Título: {item['title']}\nConteúdo: {item['content']}")
-            all_source_urls.append(item['url'])
-    elif isinstance(serper_results, Exception):
-        logger.error(f"Erro ao obter resultados do SerpApi: {serper_results}")
+    if duplicated_items:
+        logger.info(f"{duplicated_items} itens duplicados (mesmo título) descartados para '{theme}'.")
 
     compiled_text = "\n\n".join(all_raw_material)
     unique_source_urls = list(set(all_source_urls)) # Remover URLs duplicadas
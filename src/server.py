@@ -1,30 +1,161 @@
 # src/server.py
 
-from fastapi import FastAPI, HTTPException, Depends, Query, Request, Body
+from fastapi import FastAPI, HTTPException, Depends
+from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse
 import logging
 import jwt
 import base64
-import os
+import hashlib
 import asyncio
-import requests # Necessário para send_logs_to_backend e tratamento de exceções
+import time
+from collections import OrderedDict
+from cachetools import TTLCache
+import aiohttp
+from contextlib import asynccontextmanager
 from datetime import datetime, timezone
-from pydantic import BaseModel, ValidationError
-from sqlalchemy.orm import Session
-import json
-from typing import Optional
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from tenacity import retry, stop_after_attempt, wait_exponential_jitter
 import uuid # Importado para gerar report_id
 
 from src.main import main as run_automation # Importar a função main do src.main
 from src.config import Config # Importar Config
-from src.database import get_db # Importar get_db
-from src.models import AutomationRequest # Importar AutomationRequest model
-from src.api import send_logs_to_backend # Importar função para enviar logs ao backend
+from src.database import get_async_db # Sessão assíncrona do banco de dados
+from src.models import AutomationRequest, TriggerRequest # Modelos do BD e do corpo de POST /trigger
+from src.api import prepare_log_payload # Normaliza o log antes do envio ao backend
 
 logger = logging.getLogger(__name__)
 
-app = FastAPI()
+# --- ENVIO ASSÍNCRONO DE LOGS PARA O BACKEND ---
+# Os handlers apenas enfileiram os logs; uma task em background os envia em lotes,
+# sem bloquear o event loop com um requests.post síncrono a cada erro.
+LOG_QUEUE_MAXSIZE = 1000
+LOG_BATCH_SIZE = 50
+LOG_BATCH_TIMEOUT_SECONDS = 0.25
+LOG_SHUTDOWN_FLUSH_SECONDS = 5
+LOG_SEND_ATTEMPTS = 3
+
+log_queue = None # asyncio.Queue criada no lifespan (precisa pertencer ao event loop do servidor)
+
+
+def _put_log(log_data):
+    """Coloca um log na fila; se estiver cheia, descarta o mais antigo para não bloquear os handlers."""
+    try:
+        log_queue.put_nowait(log_data)
+    except asyncio.QueueFull:
+        log_queue.get_nowait()
+        log_queue.task_done()
+        log_queue.put_nowait(log_data)
+        logger.warning("Fila de logs cheia. Log mais antigo descartado.")
+
+
+def enqueue_log(log_data):
+    """
+    Enfileira um log para envio assíncrono ao backend de logs.
+    Deve ser chamado do event loop do servidor (todos os handlers e dependências que registram logs são async).
+    """
+    if log_queue is None:
+        logger.warning(f"Envio de logs não inicializado. Log descartado: {log_data.get('action')}")
+        return
+    _put_log(log_data)
+
+
+# Mesmas 3 tentativas do send_logs_to_backend síncrono, com backoff exponencial em vez de espera fixa
+@retry(stop=stop_after_attempt(LOG_SEND_ATTEMPTS), wait=wait_exponential_jitter(initial=0.5, max=4), reraise=True)
+async def _send_log(session, payload):
+    """Faz o POST de um log já normalizado; exceções são propagadas para o retry."""
+    async with session.post(Config.LOGS_API_URL, json=payload) as response:
+        response.raise_for_status()
+
+
+async def _post_log(session, log_data):
+    """Envia um único log ao backend usando a sessão HTTP compartilhada."""
+    try:
+        await _send_log(session, prepare_log_payload(log_data))
+    except Exception as e:
+        logger.error(f"Erro ao enviar log para o backend em {Config.LOGS_API_URL}: {str(e)}")
+
+
+async def ship_logs(queue, session):
+    """
+    Consome a fila de logs: aguarda o primeiro item, agrupa até LOG_BATCH_SIZE itens
+    (ou LOG_BATCH_TIMEOUT_SECONDS) e envia o lote concorrentemente pela ClientSession compartilhada.
+    """
+    loop = asyncio.get_running_loop()
+    while True:
+        batch = [await queue.get()]
+        deadline = loop.time() + LOG_BATCH_TIMEOUT_SECONDS
+        while len(batch) < LOG_BATCH_SIZE:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+
+        # O endpoint de logs do backend recebe um log por requisição: o lote é enviado
+        # em paralelo, reaproveitando as conexões keep-alive da sessão.
+        await asyncio.gather(*(_post_log(session, log_data) for log_data in batch))
+        for _ in batch:
+            queue.task_done()
+
+
+@asynccontextmanager
+async def lifespan(app):
+    """
+    Cria a sessão HTTP compartilhada (app.state.http) e inicia o envio de logs em background.
+    Ao desligar o servidor, cancela as automações em andamento, tenta esvaziar a fila de logs e fecha a sessão.
+    """
+    global log_queue
+    # Uma única ClientSession para as chamadas HTTP assíncronas do servidor: reaproveita conexões
+    # keep-alive e sessões TLS em vez de abrir uma conexão nova a cada requisição.
+    app.state.http = aiohttp.ClientSession(
+        connector=aiohttp.TCPConnector(limit=100, keepalive_timeout=30),
+        timeout=aiohttp.ClientTimeout(total=Config.REQUEST_TIMEOUT)
+    )
+    shipper = None
+    if Config.LOGS_API_URL:
+        log_queue = asyncio.Queue(maxsize=LOG_QUEUE_MAXSIZE)
+        shipper = asyncio.create_task(ship_logs(log_queue, app.state.http))
+        logger.info("Envio assíncrono de logs para o backend iniciado.")
+    try:
+        yield
+    finally:
+        # Antes do flush: os logs das automações interrompidas também precisam ser enviados
+        await cancel_running_jobs()
+        if shipper:
+            try:
+                await asyncio.wait_for(log_queue.join(), LOG_SHUTDOWN_FLUSH_SECONDS)
+            except asyncio.TimeoutError:
+                logger.warning(f"Tempo esgotado ao esvaziar a fila de logs. {log_queue.qsize()} logs não enviados.")
+            shipper.cancel()
+            # Aguarda o cancelamento: o shipper pode estar no meio de um session.post e a sessão
+            # só pode ser fechada depois que ele terminar
+            try:
+                await shipper
+            except asyncio.CancelledError:
+                pass
+            log_queue = None
+        await app.state.http.close()
+
+
+def _log_error(action, level="ERROR"):
+    """Enfileira um registro de erro/aviso para o backend de logs, se LOGS_API_URL estiver configurada."""
+    if not Config.LOGS_API_URL:
+        return
+    try:
+        enqueue_log({"action": action, "timestamp": datetime.now(timezone.utc), "level": level})
+    except Exception as log_err:
+        logger.error(f"Erro ao enfileirar log para o backend: {str(log_err)}", exc_info=True)
+
+# --- FIM DO ENVIO ASSÍNCRONO DE LOGS ---
+
+app = FastAPI(lifespan=lifespan, default_response_class=ORJSONResponse)
+# Comprime respostas maiores que 1 KB (ex: report_summary em /trigger-status) para clientes que aceitam gzip
+app.add_middleware(GZipMiddleware, minimum_size=1024)
 security = HTTPBearer()
 
 # Carregar chave secreta do JWT da variável de ambiente
@@ -37,20 +168,48 @@ except Exception as e:
     JWT_SECRET = b"fallback_secret_para_evitar_erro_startup_insecure" # Fallback seguro
 
 ALGORITHM = "HS512"
+ALGORITHMS = (ALGORITHM,) # Tupla reutilizada em todas as verificações (evita criar uma lista por requisição)
+
+# Cache LRU de tokens já verificados: digest do token -> payload decodificado.
+# Evita refazer a verificação HS512 a cada requisição do mesmo cliente com o mesmo token.
+# Sem lock: decode_token só é chamado por verify_token, que roda no event loop (uma chamada por vez).
+TOKEN_CACHE_MAXSIZE = 4096
+_token_cache = OrderedDict()
+
 
-class TriggerRequest(BaseModel):
-    """Modelo Pydantic para o corpo da requisição POST /trigger."""
-    output_format: str = Config.OUTPUT_FORMAT
-    theme: Optional[str] = None # Tema é opcional
+def decode_token(token):
+    """
+    Decodifica e verifica um token JWT, reaproveitando o resultado de verificações anteriores.
+    Tokens em cache têm a expiração ('exp') conferida a cada uso, para que um token expirado
+    nunca seja aceito a partir do cache.
+    Retorna uma cópia do payload: alterações feitas por um handler não vazam para outras requisições.
+    """
+    key = hashlib.blake2b(token.encode("utf-8"), digest_size=16).digest()
+    payload = _token_cache.get(key)
+    if payload is not None:
+        exp = payload.get("exp")
+        if exp is not None and exp <= time.time():
+            del _token_cache[key]
+            raise jwt.ExpiredSignatureError("Signature has expired")
+        _token_cache.move_to_end(key)
+        return dict(payload)
+
+    payload = jwt.decode(token, JWT_SECRET, algorithms=ALGORITHMS)
+    _token_cache[key] = payload
+    if len(_token_cache) > TOKEN_CACHE_MAXSIZE:
+        _token_cache.popitem(last=False)
+    return dict(payload)
 
-def verify_token(credentials: HTTPAuthorizationCredentials = Depends(security)):
+async def verify_token(credentials: HTTPAuthorizationCredentials = Depends(security)):
     """Dependência para verificar o token JWT nos headers."""
     token = credentials.credentials
-    logger.debug(f"Verificando token JWT: {token[:10]}...")
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Verificando token JWT: %s...", token[:10])
     try:
-        payload = jwt.decode(token, JWT_SECRET, algorithms=[ALGORITHM])
-        logger.info(f"Token verificado com sucesso. Payload: {payload}")
-        return {"payload": payload, "token": token}
+        payload = decode_token(token)
+        logger.info("Token verificado com sucesso. Payload: %s", payload)
+        # O header de autenticação é montado uma única vez aqui e reutilizado pelos handlers
+        return {"payload": payload, "token": token, "auth_header": {"Authorization": "Bearer " + token}}
     except jwt.ExpiredSignatureError:
         logger.warning("Token JWT expirado.")
         raise HTTPException(status_code=401, detail="Token expirado")
@@ -59,98 +218,190 @@ def verify_token(credentials: HTTPAuthorizationCredentials = Depends(security)):
         raise HTTPException(status_code=401, detail=f"Token inválido: {str(e)}")
     except Exception as e:
         logger.error(f"Erro inesperado ao verificar token: {str(e)}", exc_info=True)
-        if Config.LOGS_API_URL:
-            try:
-                log_data = {
-                    "action": f"Erro interno ao verificar token: {str(e)}",
-                    "timestamp": datetime.now(timezone.utc), # Usar datetime object aqui
-                    "level": "ERROR"
-                }
-                send_logs_to_backend(log_data)
-            except Exception as log_err:
-                logger.error(f"Erro ao enviar log de erro de token para o backend: {str(log_err)}", exc_info=True)
+        _log_error(f"Erro interno ao verificar token: {str(e)}")
         raise HTTPException(status_code=500, detail="Erro interno ao verificar token")
 
 
+# --- EXECUÇÃO DA AUTOMAÇÃO EM BACKGROUND ---
+# Os endpoints de trigger respondem 202 imediatamente com um report_id; a automação roda
+# em uma task e o resultado é consultado em /trigger-status/{report_id}.
+# O registro é em memória, por processo: execuções antigas já finalizadas são descartadas.
+AUTOMATION_JOBS_MAXSIZE = 1000
+FINISHED_JOB_STATUSES = ("COMPLETED", "FAILED")
+
+automation_jobs = {} # report_id -> estado da execução
+_running_tasks = set() # Mantém referência às tasks para que não sejam coletadas antes de terminar
+
+
+def _prune_finished_jobs():
+    """Remove as execuções finalizadas mais antigas quando o registro excede o limite."""
+    excess = len(automation_jobs) - AUTOMATION_JOBS_MAXSIZE
+    if excess <= 0:
+        return
+    for report_id in [rid for rid, job in automation_jobs.items() if job["status"] in FINISHED_JOB_STATUSES][:excess]:
+        del automation_jobs[report_id]
+
+
+async def _run_and_store(report_id, output_format, theme, auth_headers, description):
+    """Executa a automação (src.main.main) e guarda o relatório ou o erro no registro de execuções."""
+    job = automation_jobs[report_id]
+    job["status"] = "RUNNING"
+    try:
+        output_report = await run_automation(
+            output_format=output_format,
+            theme=theme,
+            auth_headers=auth_headers
+        )
+        job["report_summary"] = output_report if isinstance(output_report, str) else str(output_report)
+        job["status"] = "COMPLETED"
+        logger.info(f"Automação {report_id} ({description}) executada com sucesso.")
+    except Exception as e:
+        job["error"] = str(e)
+        job["status"] = "FAILED"
+        logger.error(f"Erro inesperado na execução da automação {report_id} ({description}): {str(e)}", exc_info=True)
+        _log_error(f"Erro inesperado na execução da automação {report_id} ({description}). Erro: {str(e)}", level="CRITICAL")
+    finally:
+        job["finished_at"] = datetime.now(timezone.utc).isoformat()
+
+
+def start_automation_job(output_format, theme, auth_headers, description):
+    """Registra uma nova execução como PENDING, agenda-a em background e retorna seu report_id."""
+    report_id = uuid.uuid4().hex
+    automation_jobs[report_id] = {
+        "status": "PENDING",
+        "parameters": {"output_format": output_format, "theme": theme},
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "finished_at": None,
+        "report_summary": None,
+        "error": None
+    }
+    _prune_finished_jobs()
+    task = asyncio.create_task(_run_and_store(report_id, output_format, theme, auth_headers, description))
+    _running_tasks.add(task)
+    task.add_done_callback(_running_tasks.discard)
+    logger.info("Automação %s (%s) agendada em background.", report_id, description)
+    return report_id
+
+
+async def cancel_running_jobs():
+    """
+    Cancela as automações ainda em execução e aguarda seu término (usado no desligamento do servidor).
+    As execuções que não chegaram ao fim são marcadas como FAILED no registro.
+    Chamadas síncronas já em andamento em threads do executor não são interrompidas; apenas deixam de ser aguardadas.
+    """
+    tasks = list(_running_tasks)
+    if tasks:
+        logger.warning("Desligando servidor: cancelando %s automações em andamento.", len(tasks))
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    finished_at = datetime.now(timezone.utc).isoformat()
+    for report_id, job in automation_jobs.items():
+        if job["status"] in FINISHED_JOB_STATUSES:
+            continue
+        job["status"] = "FAILED"
+        job["error"] = "Automação interrompida pelo desligamento do servidor."
+        job["finished_at"] = finished_at
+        logger.error("Automação %s interrompida pelo desligamento do servidor.", report_id)
+        _log_error(f"Automação {report_id} interrompida pelo desligamento do servidor.", level="CRITICAL")
+
+
+def accepted_response(report_id, output_format, theme):
+    """Resposta 202 devolvida pelos endpoints de trigger."""
+    response_content = {
+        "message": "Automação aceita para execução.",
+        "report_id": report_id,
+        "status": "accepted",
+        "parameters": {"output_format": output_format, "theme": theme}
+    }
+    return ORJSONResponse(content=response_content, status_code=202, media_type="application/json; charset=utf-8")
+
+# --- FIM DA EXECUÇÃO EM BACKGROUND ---
+
+
+# Cache curto dos parâmetros de AutomationRequest por ID: retentativas do Spring Boot para o mesmo ID
+# dentro da janela não voltam ao banco de dados.
+AUTOMATION_REQUEST_CACHE_TTL_SECONDS = 30
+automation_request_cache = TTLCache(maxsize=2048, ttl=AUTOMATION_REQUEST_CACHE_TTL_SECONDS) # id -> (output_format, theme)
+_automation_request_locks = {} # id -> [asyncio.Lock, nº de consultas usando o lock]
+
+
+async def get_automation_request_params(db, id):
+    """
+    Retorna (output_format, theme) do AutomationRequest com o ID informado, ou None se não existir.
+    Acertos no cache não usam lock. Em uma falta, as consultas simultâneas ao mesmo ID aguardam
+    um lock daquele ID (uma só ida ao banco); IDs diferentes consultam o banco em paralelo.
+    """
+    params = automation_request_cache.get(id)
+    if params is not None:
+        logger.debug("Parâmetros do ID %s obtidos do cache.", id)
+        return params
+
+    entry = _automation_request_locks.get(id)
+    if entry is None:
+        entry = _automation_request_locks[id] = [asyncio.Lock(), 0]
+    entry[1] += 1
+    try:
+        async with entry[0]:
+            params = automation_request_cache.get(id) # Pode ter sido preenchido por quem segurava o lock
+            if params is None:
+                result = await db.execute(select(AutomationRequest).where(AutomationRequest.id == id))
+                request_entry = result.scalar_one_or_none()
+                if request_entry is None:
+                    return None
+                params = (request_entry.output_format, request_entry.theme)
+                automation_request_cache[id] = params
+        return params
+    finally:
+        entry[1] -= 1
+        if entry[1] == 0: # Ninguém mais aguardando: o lock do ID é descartado
+            del _automation_request_locks[id]
+
+
 # Endpoint para acionar a automação via ID do registro no BD
 @app.get("/trigger-by-id/{id}")
 async def trigger_by_id(
     id: int,
     user: dict = Depends(verify_token), # Requer token JWT
-    db: Session = Depends(get_db) # Requer sessão de BD para buscar AutomationRequest
+    db: AsyncSession = Depends(get_async_db) # Requer sessão de BD para buscar AutomationRequest
 ):
     """
     Aciona a automação de geração de posts com base em um registro existente no banco de dados.
+    Responde 202 com um report_id; o andamento é consultado em /trigger-status/{report_id}.
     Requer um token JWT válido.
     """
-    logger.info(f"Endpoint /trigger-by-id/{id} acionado pelo usuário: {user['payload'].get('sub', 'Desconhecido')}")
+    logger.info("Endpoint /trigger-by-id/%s acionado pelo usuário: %s", id, user['payload'].get('sub', 'Desconhecido'))
     try:
-        # Busca o registro no banco de dados compartilhado
-        request_entry = db.query(AutomationRequest).filter(AutomationRequest.id == id).first()
-        if not request_entry:
+        # Busca o registro no banco de dados compartilhado (ou no cache de curta duração)
+        request_params = await get_automation_request_params(db, id)
+        if not request_params:
             logger.warning(f"Registro com ID {id} não encontrado no banco de dados compartilhado.")
-            if Config.LOGS_API_URL:
-                try:
-                    log_data = {
-                        "action": f"Falha ao executar automação para ID {id}: Registro não encontrado.",
-                        "timestamp": datetime.now(timezone.utc), # Usar datetime object aqui
-                        "level": "WARNING"
-                    }
-                    send_logs_to_backend(log_data)
-                except Exception as log_err:
-                    logger.error(f"Erro ao enviar log de ID não encontrado para o backend: {str(log_err)}", exc_info=True)
+            _log_error(f"Falha ao executar automação para ID {id}: Registro não encontrado.", level="WARNING")
             raise HTTPException(status_code=404, detail=f"Registro com ID {id} não encontrado")
 
         # Extrai os parâmetros do registro do DB
-        output_format = request_entry.output_format
-        theme = request_entry.theme
-        logger.info(f"Parâmetros do DB para ID {id}: output_format='{output_format}', theme='{theme}'")
+        output_format, theme = request_params
+        logger.info("Parâmetros do DB para ID %s: output_format='%s', theme='%s'", id, output_format, theme)
 
-        # Chama a função principal de automação (src.main.main)
+        # Agenda a função principal de automação (src.main.main) em background
         # O token original é passado para que run_automation possa usá-lo em chamadas para o Spring Boot
-        output_report = await run_automation(
-            output_format=output_format,
-            theme=theme,
-            auth_headers={"Authorization": f"Bearer {user['token']}"} # Passa o token recebido
+        report_id = start_automation_job(
+            output_format,
+            theme,
+            user["auth_header"], # Passa o token recebido
+            f"ID {id}"
         )
-
-        if not isinstance(output_report, str):
-            output_report = str(output_report)
-
-        response_content = {
-            "message": "Automação executada com sucesso!",
-            "report_summary": output_report,
-            "parameters": {"output_format": output_format, "theme": theme}
-        }
-        logger.info(f"Automação executada com sucesso para ID {id}.")
-        return JSONResponse(content=response_content, media_type="application/json; charset=utf-8")
+        return accepted_response(report_id, output_format, theme)
 
     except HTTPException as http_exc:
         logger.error(f"HTTPException levantada durante a execução para ID {id}: {str(http_exc.detail)}", exc_info=True)
-        if Config.LOGS_API_URL:
-            try:
-                log_data = {
-                    "action": f"Falha na execução da automação para ID {id}. Erro: {str(http_exc.detail)}",
-                    "timestamp": datetime.now(timezone.utc), # Usar datetime object aqui
-                    "level": "ERROR"
-                }
-                send_logs_to_backend(log_data)
-            except Exception as log_err:
-                logger.error(f"Erro ao enviar log de HTTPException para o backend: {str(log_err)}", exc_info=True)
+        _log_error(f"Falha na execução da automação para ID {id}. Erro: {str(http_exc.detail)}")
         raise # Re-levanta a HTTPException original
     except Exception as e:
-        logger.error(f"Erro inesperado ao executar automação via /trigger-by-id/{id}: {str(e)}", exc_info=True)
-        if Config.LOGS_API_URL:
-            try:
-                log_data = {
-                    "action": f"Erro inesperado na execução da automação para ID {id}. Erro: {str(e)}",
-                    "timestamp": datetime.now(timezone.utc), # Usar datetime object aqui
-                    "level": "CRITICAL"
-                }
-                send_logs_to_backend(log_data)
-            except Exception as log_err:
-                logger.error(f"Erro ao enviar log de erro inesperado para o backend: {str(log_err)}", exc_info=True)
-        raise HTTPException(status_code=500, detail=f"Erro interno ao executar automação: {str(e)}")
+        logger.error(f"Erro inesperado ao agendar automação via /trigger-by-id/{id}: {str(e)}", exc_info=True)
+        _log_error(f"Erro inesperado ao agendar a automação para ID {id}. Erro: {str(e)}", level="CRITICAL")
+        raise HTTPException(status_code=500, detail=f"Erro interno ao agendar automação: {str(e)}")
 
 
 # Endpoint para acionar a automação via corpo da requisição (POST com JSON)
@@ -161,86 +412,74 @@ async def trigger_automation_post(
 ):
     """
     Aciona a automação de geração de posts com base em parâmetros fornecidos no corpo da requisição JSON.
+    Responde 202 com um report_id; o andamento é consultado em /trigger-status/{report_id}.
     Requer um token JWT válido.
     """
-    logger.info(f"Endpoint POST /trigger acionado pelo usuário: {user['payload'].get('sub', 'Desconhecido')}")
+    logger.info("Endpoint POST /trigger acionado pelo usuário: %s", user['payload'].get('sub', 'Desconhecido'))
 
     output_format = request_data.output_format
     theme = request_data.theme
 
     try:
-        logger.info(f"Parâmetros recebidos: output_format='{output_format}', theme='{theme}'")
+        logger.info("Parâmetros recebidos: output_format='%s', theme='%s'", output_format, theme)
 
-        # Chama a função principal de automação (src.main.main)
+        # Agenda a função principal de automação (src.main.main) em background
         # Reutiliza o token recebido para chamadas internas da automação
-        output_report = await run_automation(
-            output_format=output_format,
-            theme=theme,
-            auth_headers={"Authorization": f"Bearer {user['token']}"} # Passa o token recebido
+        report_id = start_automation_job(
+            output_format,
+            theme,
+            user["auth_header"], # Passa o token recebido
+            "POST /trigger"
         )
+        logger.info("Retornando resposta 202 para POST /trigger.")
+        return accepted_response(report_id, output_format, theme)
 
-        if not isinstance(output_report, str):
-            output_report = str(output_report)
-
-        response_content = {
-            "message": "Automação executada com sucesso!",
-            "report_summary": output_report,
-            "parameters": {"output_format": output_format, "theme": theme}
-        }
-        logger.info("Retornando resposta de sucesso para POST /trigger.")
-        return JSONResponse(content=response_content, media_type="application/json; charset=utf-8")
-
-    except ValidationError as e:
-        logger.error(f"Erro de validação Pydantic para POST /trigger: {str(e)}", exc_info=True)
-        if Config.LOGS_API_URL:
-            try:
-                log_data = {
-                    "action": f"Falha de validação Pydantic para POST /trigger. Erro: {str(e)}",
-                    "timestamp": datetime.now(timezone.utc), # Usar datetime object aqui
-                    "level": "ERROR"
-                }
-                send_logs_to_backend(log_data)
-            except Exception as log_err:
-                logger.error(f"Erro ao enviar log de ValidationError para o backend: {str(log_err)}", exc_info=True)
-        errors = e.errors()
-        formatted_errors = [{"loc": err["loc"], "msg": err["msg"], "type": err["type"]} for err in errors]
-        raise HTTPException(status_code=400, detail={"message": "Erro de validação do corpo da requisição.", "errors": formatted_errors})
     except HTTPException as http_exc:
         logger.error(f"HTTPException levantada durante a execução de POST /trigger: {str(http_exc.detail)}", exc_info=True)
-        if Config.LOGS_API_URL:
-            try:
-                log_data = {
-                    "action": f"Falha na execução da automação POST /trigger. Erro: {str(http_exc.detail)}",
-                    "timestamp": datetime.now(timezone.utc), # Usar datetime object aqui
-                    "level": "ERROR"
-                }
-                send_logs_to_backend(log_data)
-            except Exception as log_err:
-                logger.error(f"Erro ao enviar log de HTTPException para o backend: {str(log_err)}", exc_info=True)
+        _log_error(f"Falha na execução da automação POST /trigger. Erro: {str(http_exc.detail)}")
         raise
     except Exception as e:
-        logger.error(f"Erro inesperado ao executar automação via POST /trigger: {str(e)}", exc_info=True)
-        if Config.LOGS_API_URL:
-            try:
-                log_data = {
-                    "action": f"Erro inesperado na execução da automação POST /trigger. Erro: {str(e)}",
-                    "timestamp": datetime.now(timezone.utc), # Usar datetime object aqui
-                    "level": "CRITICAL"
-                }
-                send_logs_to_backend(log_data)
-            except Exception as log_err:
-                logger.error(f"Erro ao enviar log de erro inesperado para o backend: {str(log_err)}", exc_info=True)
-        raise HTTPException(status_code=500, detail=f"Erro interno ao executar automação: {str(e)}")
+        logger.error(f"Erro inesperado ao agendar automação via POST /trigger: {str(e)}", exc_info=True)
+        _log_error(f"Erro inesperado ao agendar a automação POST /trigger. Erro: {str(e)}", level="CRITICAL")
+        raise HTTPException(status_code=500, detail=f"Erro interno ao agendar automação: {str(e)}")
+
+# Endpoint para consultar o andamento de uma automação agendada
+@app.get("/trigger-status/{report_id}")
+async def trigger_status(
+    report_id: str,
+    user: dict = Depends(verify_token) # Requer token JWT
+):
+    """
+    Retorna o estado (PENDING, RUNNING, COMPLETED ou FAILED) de uma automação agendada
+    e, quando finalizada, o relatório ou o erro da execução.
+    """
+    job = automation_jobs.get(report_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Execução {report_id} não encontrada")
+    return ORJSONResponse(content={"report_id": report_id, **job}, media_type="application/json; charset=utf-8")
+
+# Resposta de /test-ok serializada uma única vez: o endpoint é usado como health check,
+# e a Response não guarda estado por requisição, então pode ser reutilizada.
+TEST_OK_RESPONSE = ORJSONResponse(content={"status": "ok", "message": "Conexão com servidor Python bem-sucedida!"})
 
 # Endpoint simples para testar a conexão (mantido)
 @app.get("/test-ok")
 async def test_ok_endpoint():
     """Endpoint simples para testar a conexão."""
     logger.info("Endpoint /test-ok acionado. Retornando OK.")
-    return JSONResponse(content={"status": "ok", "message": "Conexão com servidor Python bem-sucedida!"})
+    return TEST_OK_RESPONSE
 
 # Ponto de entrada principal se rodar o servidor diretamente com uvicorn
 if __name__ == "__main__":
     import uvicorn
     logger.info("Iniciando servidor FastAPI...")
-    uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
+    # Com uvicorn[standard] instalado, o loop e o parser HTTP padrão ("auto") são uvloop e httptools.
+    # Múltiplos workers exigem a app como string de importação (cada worker importa o módulo);
+    # com um único worker, a própria app é passada, sem importar src.server uma segunda vez.
+    uvicorn.run(
+        "src.server:app" if Config.SERVER_WORKERS > 1 else app,
+        host=Config.SERVER_HOST,
+        port=Config.SERVER_PORT,
+        workers=Config.SERVER_WORKERS,
+        log_level=Config.SERVER_LOG_LEVEL
+    )
\ No newline at end of file
@@ -1,110 +1,284 @@
 # src/utils.py
 import os
-import json
+import asyncio
+import atexit
+import hashlib
+import itertools
 import logging
-from datetime import datetime, timedelta, timezone # Importar timezone
-import uuid # Importar uuid para save_payload_to_file
+import queue
+import tempfile
+import threading
+import time
+import orjson
+from datetime import datetime, timezone # Importar timezone
 
 logger = logging.getLogger(__name__)
 
-# Caminho para o arquivo de cache
-CACHE_FILE = "output/cache.json"
+_UTC = timezone.utc
 
-# Garante que a pasta 'output' e suas subpastas existam
+# O cache é dividido em dois arquivos: metadados pequenos (timestamp, assinatura, caminho dos dados)
+# e os dados em si, que só são lidos quando o cache é válido. Cada gravação usa um arquivo de dados
+# com nome próprio (cache.data.<instante em ns>.json), registrado nos metadados em 'data_path'.
+CACHE_META_FILE = "output/cache.meta.json"
+CACHE_DATA_PREFIX = os.path.join("output", "cache.data.")
+
+# Garante que a pasta 'output' e suas subpastas existam (uma única vez, na importação;
+# as funções de escrita abaixo não repetem a verificação a cada chamada)
 os.makedirs("output", exist_ok=True)
 os.makedirs("output/reports", exist_ok=True)
 os.makedirs("output/payloads", exist_ok=True)
 
+# Prefixos dos arquivos de relatório e de payload, montados uma única vez (sem os.path.join a cada arquivo)
+_REPORT_PREFIX = os.path.join("output", "reports", "relatorio")
+_REPORT_ERROR_PREFIX = _REPORT_PREFIX + "_erro_critico"
+_PAYLOAD_PREFIX = os.path.join("output", "payloads", "post_")
+
+
+# Cópia em memória do último cache lido/gravado, associada ao mtime do arquivo de metadados:
+# enquanto ele não mudar, check_cache não precisa reler os arquivos.
+# Os dados são guardados serializados ('data_blob') e parseados a cada acerto: cada chamador recebe
+# um objeto novo, e alterá-lo não altera o cache. 'data_blob' só é preenchido quando os dados
+# são de fato lidos (em um acerto de cache).
+_cache_memory = {"mtime_ns": None, "meta": None, "data_blob": None}
+
+
+def build_cache_signature(*parts):
+    """
+    Gera a assinatura das entradas que produziram um cache (ex: URLs das fontes e seus Last-Modified/ETag).
+    Se as entradas mudarem, a assinatura muda e o cache é invalidado, mesmo antes de o TTL expirar.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        digest.update(str(part).encode("utf-8"))
+        digest.update(b"\0") # Separador: ("ab", "c") e ("a", "bc") geram assinaturas diferentes
+    return digest.hexdigest()
+
 
-def save_cache(data):
-    """Salva dados no arquivo de cache."""
+def _write_atomic(path, blob):
+    """
+    Grava 'blob' em um arquivo temporário e o renomeia para 'path' (atômico): um leitor nunca vê o arquivo pela metade.
+    O temporário tem nome único (mkstemp), para que dois processos gravando ao mesmo tempo não escrevam no mesmo arquivo.
+    """
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=os.path.basename(path) + ".", suffix=".tmp")
     try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(blob)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path) # Não deixa temporários órfãos em caso de falha
+        except OSError:
+            pass
+        raise
+
+
+def save_cache(data, source_signature=None):
+    """
+    Salva dados no cache.
+    'source_signature' (ver build_cache_signature) identifica as entradas que geraram os dados.
+    """
+    try:
+        # Arquivo de dados dos metadados atuais, removido depois que os novos metadados o substituírem
+        try:
+            with open(CACHE_META_FILE, "rb") as f:
+                previous_data_path = orjson.loads(f.read()).get("data_path")
+        except (FileNotFoundError, orjson.JSONDecodeError):
+            previous_data_path = None
+
         # Adiciona um timestamp de quando o cache foi salvo
-        cache_data = {
-            "timestamp": datetime.now(timezone.utc).isoformat(), # Salva em UTC ISO format
-            "data": data
+        saved_at_ns = time.time_ns()
+        saved_at = saved_at_ns / 1e9
+        # Nome único por gravação: os metadados antigos continuam apontando para os dados antigos,
+        # e os novos dados só passam a ser usados quando os novos metadados substituem o arquivo.
+        data_path = f"{CACHE_DATA_PREFIX}{saved_at_ns}-{os.getpid()}.json"
+
+        # Dados primeiro, metadados depois: os metadados nunca apontam para dados incompletos.
+        # orjson serializa direto para bytes UTF-8: uma única escrita, sem o encode do modo texto.
+        blob = orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS)
+        _write_atomic(data_path, blob)
+
+        meta = {
+            "timestamp": datetime.fromtimestamp(saved_at, _UTC).isoformat(), # Salva em UTC ISO format
+            "saved_at": saved_at, # Mesmo instante em segundos desde a epoch, para a verificação rápida de validade
+            "sig": source_signature,
+            "data_path": data_path
         }
-        with open(CACHE_FILE, "w", encoding="utf-8") as f:
-            json.dump(cache_data, f, ensure_ascii=False, indent=4)
-        logger.info(f"Cache salvo em {CACHE_FILE}.")
+        _write_atomic(CACHE_META_FILE, orjson.dumps(meta))
+        if previous_data_path and previous_data_path != data_path:
+            try:
+                os.remove(previous_data_path)
+            except FileNotFoundError:
+                pass
+        _cache_memory["mtime_ns"] = os.stat(CACHE_META_FILE).st_mtime_ns
+        _cache_memory["meta"] = meta
+        _cache_memory["data_blob"] = blob # Os bytes gravados, não o objeto do chamador
+        logger.info("Cache salvo em %s (dados em %s).", CACHE_META_FILE, data_path)
     except Exception as e:
-        logger.error(f"Erro ao salvar cache em {CACHE_FILE}: {str(e)}", exc_info=True)
+        logger.error("Erro ao salvar cache em %s: %s", CACHE_META_FILE, e, exc_info=True)
+
+
+def _load_cache_data(meta):
+    """Lê e parseia os dados do cache (apenas em um acerto), reaproveitando os bytes em memória se houver."""
+    if _cache_memory["data_blob"] is None:
+        data_path = meta.get("data_path")
+        if not data_path:
+            logger.warning("Cache encontrado, mas incompleto ou inválido.")
+            return None
+        with open(data_path, "rb") as f:
+            _cache_memory["data_blob"] = f.read()
+    cached_data = orjson.loads(_cache_memory["data_blob"])
+    if not cached_data:
+        logger.warning("Cache encontrado, mas incompleto ou inválido.")
+        return None
+    return cached_data
 
 
-def check_cache(cache_duration_hours):
-    """Verifica se o cache existe e é válido (não expirado)."""
-    if not os.path.exists(CACHE_FILE):
+def check_cache(cache_duration_hours, source_signature=None):
+    """
+    Verifica se o cache existe e é válido (não expirado).
+    Se 'source_signature' for informada, o cache só é válido se tiver sido gerado a partir das mesmas entradas.
+    Só os metadados são lidos para decidir; os dados são parseados apenas quando o cache é válido.
+    """
+    try:
+        mtime_ns = os.stat(CACHE_META_FILE).st_mtime_ns
+    except FileNotFoundError:
         logger.info("Arquivo de cache não encontrado.")
         return None
 
     try:
-        with open(CACHE_FILE, "r", encoding="utf-8") as f:
-            cache_data = json.load(f)
+        if mtime_ns == _cache_memory["mtime_ns"]:
+            meta = _cache_memory["meta"]
+        else:
+            with open(CACHE_META_FILE, "rb") as f:
+                meta = orjson.loads(f.read())
+            _cache_memory["mtime_ns"] = mtime_ns
+            _cache_memory["meta"] = meta
+            _cache_memory["data_blob"] = None
 
-        cache_timestamp_str = cache_data.get("timestamp")
-        cached_data = cache_data.get("data")
+        cache_timestamp_str = meta.get("timestamp")
 
-        if not cache_timestamp_str or not cached_data:
+        if not cache_timestamp_str:
             logger.warning("Cache encontrado, mas incompleto ou inválido.")
             return None
 
-        # Converte o timestamp do cache para objeto datetime (assumindo que está em UTC)
-        cache_timestamp = datetime.fromisoformat(cache_timestamp_str).replace(tzinfo=timezone.utc)
-        
-        # Calcula o tempo de expiração
-        expiration_time = cache_timestamp + timedelta(hours=cache_duration_hours)
-        
-        # Compara com o tempo atual em UTC
-        if datetime.now(timezone.utc) < expiration_time:
-            logger.info(f"Cache válido. Expira em: {expiration_time.isoformat()}.")
-            return cached_data
-        else:
-            logger.info(f"Cache expirado. Salvo em: {cache_timestamp.isoformat()}. Expiração: {expiration_time.isoformat()}.")
+        if source_signature is not None and meta.get("sig") != source_signature:
+            logger.info("Cache invalidado: as entradas que geraram os dados mudaram.")
             return None
-    except json.JSONDecodeError:
-        logger.error(f"Erro ao decodificar JSON do cache em {CACHE_FILE}. O arquivo pode estar corrompido.", exc_info=True)
-        os.remove(CACHE_FILE) # Remove o arquivo corrompido
+
+        saved_at = meta.get("saved_at")
+        if saved_at is None:
+            # Metadados sem 'saved_at': deriva o instante do timestamp ISO (assumindo que está em UTC)
+            saved_at = datetime.fromisoformat(cache_timestamp_str).replace(tzinfo=_UTC).timestamp()
+
+        # Uma soma e uma comparação de floats, sem criar datetimes; as datas só são formatadas
+        # se as mensagens de INFO forem de fato emitidas.
+        expires_at = saved_at + cache_duration_hours * 3600
+        if time.time() < expires_at:
+            if logger.isEnabledFor(logging.INFO):
+                logger.info("Cache válido. Expira em: %s.", datetime.fromtimestamp(expires_at, _UTC).isoformat())
+            return _load_cache_data(meta)
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("Cache expirado. Salvo em: %s. Expiração: %s.", cache_timestamp_str, datetime.fromtimestamp(expires_at, _UTC).isoformat())
         return None
     except Exception as e:
-        logger.error(f"Erro ao verificar cache em {CACHE_FILE}: {str(e)}", exc_info=True)
+        logger.error("Erro ao verificar cache em %s: %s", CACHE_META_FILE, e, exc_info=True)
         return None
 
 
 def save_report(report_lines, is_error=False):
     """Salva o relatório de execução em um arquivo local."""
-    report_dir = "output/reports" # Salva relatórios em subpasta 'reports'
-    os.makedirs(report_dir, exist_ok=True)
     timestamp_str = datetime.now().strftime('%Y%m%d_%H%M%S')
-    filename_prefix = "relatorio_erro_critico" if is_error else "relatorio"
-    report_filename = os.path.join(report_dir, f"{filename_prefix}_{timestamp_str}.txt")
+    filename_prefix = _REPORT_ERROR_PREFIX if is_error else _REPORT_PREFIX # Salva relatórios em subpasta 'reports'
+    report_filename = f"{filename_prefix}_{timestamp_str}.txt"
 
     try:
-        with open(report_filename, "w", encoding="utf-8") as report_file:
-            report_file.write("\n".join(report_lines))
-        logger.info(f"Relatório salvo em {report_filename}")
+        # Cada linha é codificada uma única vez direto em um buffer de bytes, sem montar o relatório
+        # inteiro como string, e o buffer vai para o disco em uma só escrita.
+        buf = bytearray()
+        for line in report_lines:
+            buf += line.encode("utf-8")
+            buf += b"\n"
+        with open(report_filename, "wb", buffering=1 << 20) as report_file:
+            report_file.write(memoryview(buf))
+        logger.info("Relatório salvo em %s", report_filename)
         return report_filename # Retorna o caminho do arquivo salvo
     except Exception as e:
-        logger.error(f"Erro ao salvar relatório em {report_filename}: {str(e)}", exc_info=True)
+        logger.error("Erro ao salvar relatório em %s: %s", report_filename, e, exc_info=True)
         return None
 
 
+# Escrita de payloads em background: save_payload_to_file apenas serializa e enfileira,
+# e uma thread daemon grava os arquivos em lotes, fora do caminho de geração dos posts.
+PAYLOAD_WRITE_BATCH_SIZE = 32
+_payload_queue = queue.Queue()
+
+# Identificadores de payload: pid + contador + milissegundos. Únicos dentro do processo (e entre
+# processos, pelo pid) sem a leitura de /dev/urandom que o uuid4 faz a cada chamada.
+_PAYLOAD_COUNTER = itertools.count()
+_PID = os.getpid()
+
+# Caracteres trocados por '_' no nome do tema: separadores de caminho, espaço e os proibidos em nomes de arquivo no Windows
+_SANITIZE = str.maketrans({c: "_" for c in ' /\\:*?"<>|'})
+
+
+def _write_payload(filename, blob):
+    """Grava um payload já serializado em disco."""
+    try:
+        with open(filename, "wb") as file:
+            file.write(blob)
+        logger.info("Payload salvo em: %s", filename)
+    except Exception as e:
+        logger.error("Erro ao salvar payload em %s: %s", filename, e, exc_info=True)
+
+
+def _drain_payload_queue():
+    """Loop da thread de escrita: aguarda um payload e grava até PAYLOAD_WRITE_BATCH_SIZE por vez."""
+    while True:
+        batch = [_payload_queue.get()]
+        while len(batch) < PAYLOAD_WRITE_BATCH_SIZE:
+            try:
+                batch.append(_payload_queue.get_nowait())
+            except queue.Empty:
+                break
+        for filename, blob in batch:
+            _write_payload(filename, blob)
+            _payload_queue.task_done()
+
+
+def flush_payload_writes():
+    """Bloqueia até que todos os payloads enfileirados tenham sido gravados em disco."""
+    _payload_queue.join()
+
+
+threading.Thread(target=_drain_payload_queue, name="payload-writer", daemon=True).start()
+atexit.register(flush_payload_writes) # Garante que nenhum payload enfileirado se perca ao encerrar o processo
+
+
 def save_payload_to_file(payload_data, theme, content_type):
-    """Salva o payload JSON de um post em um arquivo local para auditoria."""
-    payload_dir = "output/payloads"
-    os.makedirs(payload_dir, exist_ok=True)
-    
-    # Gera um UUID para garantir nome de arquivo único
-    post_uuid = str(uuid.uuid4())
+    """
+    Salva o payload JSON de um post em um arquivo local para auditoria.
+    O payload é serializado aqui e gravado em background; retorna o caminho do arquivo.
+    """
+    # Gera um identificador para garantir nome de arquivo único
+    post_id = f"{_PID:x}-{next(_PAYLOAD_COUNTER):08x}-{int(time.time() * 1000):x}"
     # Sanitiza o nome do tema para uso em nome de arquivo
-    safe_tema_name = theme.replace(' ', '_').replace('/', '_').replace('\\', '_')
-    
-    filename = os.path.join(payload_dir, f"post_{safe_tema_name}_{content_type}_{post_uuid}.json")
-    
+    safe_tema_name = theme.translate(_SANITIZE)
+
+    filename = f"{_PAYLOAD_PREFIX}{safe_tema_name}_{content_type}_{post_id}.json"
+
     try:
-        with open(filename, "w", encoding="utf-8") as file:
-            json.dump(payload_data, file, ensure_ascii=False, indent=4)
-        logger.info(f"Payload salvo em: {filename}")
-        return filename
+        blob = orjson.dumps(payload_data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
     except Exception as e:
-        logger.error(f"Erro ao salvar payload em {filename}: {str(e)}", exc_info=True)
-        return None
\ No newline at end of file
+        logger.error("Erro ao serializar payload para %s: %s", filename, e, exc_info=True)
+        return None
+    _payload_queue.put((filename, blob))
+    return filename
+
+
+# Variante assíncrona de save_report: roda a escrita em uma thread do executor padrão, para que a
+# automação (que roda dentro do event loop do servidor) não bloqueie o loop. save_payload_to_file não
+# precisa de uma: ela só serializa e enfileira, e a gravação já acontece na thread "payload-writer".
+async def save_report_async(report_lines, is_error=False):
+    """Versão assíncrona de save_report."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, save_report, report_lines, is_error)